@@ -4,9 +4,10 @@
 # 1. Enter a food item.
 # 2. Fetch detailed nutritional information for that food item using the Nutritionix API.
 # 3. Format the retrieved data into a human-readable string.
-# 4. Save the formatted nutritional data to a text file, named with the food item and current date (YYYY-MM-DD).
-# 5. Automatically move the saved file into a 'logs' folder.
-# 6. Send the nutritional information (both in the email body and as a file attachment) via email.
+# 4. Optionally (with --archive) save the formatted nutritional data to a text file,
+#    named with the food item and current date (YYYY-MM-DD), directly inside a 'logs' folder.
+# 5. Send the nutritional information (both in the email body and as a file attachment) via email.
+#    Without --archive the attachment is built straight from memory, with no disk I/O at all.
 #
 # Prerequisites:
 # - Python installed (e.g., Anaconda).
@@ -20,66 +21,409 @@
 
 # --- Import necessary modules ---
 
-import datetime # Used for getting the current date and time for file naming and email subjects.
 import os       # Provides functions for interacting with the operating system, like creating directories or moving files.
-import requests # A popular library for making HTTP requests (e.g., GET, POST) to web APIs.
+import re       # Regular expressions, used for fast input validation.
+import string   # Handy constants for the ASCII letters and digits.
+import sys      # Gives access to command-line arguments (e.g., the --archive flag).
+import time     # Cache timestamps, freshness checks, and date strings for file names.
+from collections import OrderedDict, deque # OrderedDict backs the LRU cache; deque backs the rate limiter.
+from operator import itemgetter # Fetches several dictionary keys in one C-level call.
 
-import smtplib  # The standard Python library for sending emails using the Simple Mail Transfer Protocol (SMTP).
-from email.mime.text import MIMEText         # Used to create the plain text part of an email message.
-from email.mime.multipart import MIMEMultipart # Used to create multi-part messages, allowing for both text and attachments.
-from email.mime.base import MIMEBase         # A base class for MIME (Multipurpose Internet Mail Extensions) objects, used for attachments.
-from email import encoders                   # Used for encoding attachments (e.g., base64) so they can be sent via email.
+# Pick the fastest JSON codec available. orjson (then ujson) parses the
+# multi-kilobyte Nutritionix responses several times faster than the standard
+# library, but neither is required: if they are not installed, fall back to
+# the stdlib 'json' module. All three produce the same Python dict, and the
+# matching _json_dumps_bytes always hands back UTF-8 bytes so the cache file
+# can be written the same way no matter which library won.
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps_bytes = orjson.dumps  # orjson already returns bytes.
+except ImportError:
+    try:
+        import ujson
+        _json_loads = ujson.loads
+        def _json_dumps_bytes(obj):
+            return ujson.dumps(obj).encode('utf-8')
+    except ImportError:
+        import json
+        _json_loads = json.loads
+        def _json_dumps_bytes(obj):
+            return json.dumps(obj).encode('utf-8')
+
+import atexit   # Runs cleanup handlers (closing cached directory fds) at program exit.
+import logging  # Progress and error reporting with an adjustable verbosity level.
+import base64   # Base64 encoding, used to stream file attachments chunk by chunk.
+import io       # In-memory byte buffers, used while building streamed attachments.
+import concurrent.futures # Lets slow, independent work (like the email server login) run on a background thread.
+import threading # A lock that keeps parallel lookups from corrupting the shared disk cache.
+import socket   # Low-level networking, used to resolve the mail server once and tune its TCP socket.
+
+# Note: the heavyweight imports are deferred to their first use rather than
+# loaded here. smtplib and the email.* modules are imported inside the email
+# helpers, and 'requests' (which pulls in urllib3, ssl, charset handling, ...)
+# inside _get_session(). Runs that never get that far — bad input, API
+# failure, fully-cached dry runs — shouldn't pay their start-up cost.
+
+
+# --- Logging Setup ---
+
+# All progress and error messages go through one module logger. By default it
+# carries only a NullHandler, so importing this file as a library prints
+# nothing; main() attaches a real console handler via _configure_logging().
+# Compared to bare print() calls this also skips the string formatting work
+# entirely for messages below the active level.
+_LOG = logging.getLogger(__name__)
+_LOG.addHandler(logging.NullHandler())
+
+def _configure_logging(verbose):
+    """
+    Attaches a console handler to the module logger. Warnings and errors are
+    always shown; the chatty '  > ...' progress messages only appear when the
+    user passed --verbose on the command line.
+    """
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    _LOG.addHandler(handler)
+    _LOG.setLevel(logging.INFO if verbose else logging.WARNING)
 
 
 # --- Configuration Loading ---
 
-# This block attempts to import sensitive API keys and email credentials from 'config.py'.
-# Using a separate 'config.py' file (which is also listed in .gitignore) is a security best practice.
-# It prevents sensitive information from being accidentally committed to version control systems like Git.
-try:
-    # Attempt to import all necessary variables from config.py
-    from config import (
-        NUTRITIONIX_APP_ID,
-        NUTRITIONIX_API_KEY,
-        GMAIL_APP_PASSWORD,
-        SENDER_EMAIL,
-        RECEIVER_EMAIL
-    )
-# If the 'config.py' file is not found, or if any of the required variables are missing,
-# an ImportError will be raised.
-except ImportError:
-    # Print an informative error message to the user.
-    print("Error: config.py not found or missing API keys/email details.")
-    print("Please create/update config.py with NUTRITIONIX_APP_ID, NUTRITIONIX_API_KEY, GMAIL_APP_PASSWORD, SENDER_EMAIL, RECEIVER_EMAIL.")
-    # Exit the program because it cannot function without these crucial configuration details.
-    exit()
+# Sensitive API keys and email credentials live in a separate 'config.py'
+# file (which is also listed in .gitignore) — a security best practice that
+# prevents sensitive information from being accidentally committed to version
+# control systems like Git. The file is imported lazily, on the first call
+# that actually needs a credential, so a run that quits early (e.g., no food
+# item entered) never pays for loading it.
+_CONFIG = None
+
+# Every name config.py must provide; checked once when the file is loaded.
+_REQUIRED_CONFIG_NAMES = ('NUTRITIONIX_APP_ID', 'NUTRITIONIX_API_KEY',
+                          'GMAIL_APP_PASSWORD', 'SENDER_EMAIL', 'RECEIVER_EMAIL')
+
+def _get_config():
+    """
+    Returns the config module, importing and validating it on first use.
+    If config.py is missing, or any required variable is absent, prints an
+    informative error message and exits (the program cannot function without
+    these details).
+    """
+    global _CONFIG
+    if _CONFIG is None:
+        try:
+            import config
+            for name in _REQUIRED_CONFIG_NAMES:
+                if not hasattr(config, name):
+                    raise ImportError(name)
+        except ImportError:
+            print("Error: config.py not found or missing API keys/email details.")
+            print("Please create/update config.py with NUTRITIONIX_APP_ID, NUTRITIONIX_API_KEY, GMAIL_APP_PASSWORD, SENDER_EMAIL, RECEIVER_EMAIL.")
+            exit()
+        _CONFIG = config
+    return _CONFIG
+
+
+# --- Shared HTTP Session ---
+
+# Calling requests.post() directly opens (and closes) a brand-new TCP + TLS connection
+# to the Nutritionix API for every single query. The TLS handshake alone costs a couple
+# of network round trips, which dominates the time for such a small JSON request.
+# Sharing one Session lets every API call reuse the same keep-alive connection,
+# so only the first lookup in a run pays for the handshake.
+#
+# The Session (and the 'requests' library behind it, a large import tree of
+# urllib3, ssl, charset handling, ...) is built lazily on the first API call
+# that misses every cache: fully-cached runs never import any of it.
+_SESSION = None
+
+def _get_session():
+    """
+    Returns the shared requests.Session, creating and configuring it on
+    first use: connection pool, retry policy, compression preferences, and
+    the authentication headers from config.py.
+    """
+    global _SESSION
+    if _SESSION is not None:
+        return _SESSION
+
+    import requests
+    from requests.adapters import HTTPAdapter # Lets us attach a connection pool (and retry policy) to a Session.
+    from urllib3.util.retry import Retry      # Describes how failed/throttled requests should be retried.
+
+    _SESSION = requests.Session()
+
+    # Mount an adapter on all https:// URLs with:
+    # - a small keep-alive connection pool, and
+    # - an automatic retry policy for transient failures (429 = rate limited,
+    #   5xx = temporary server errors), with a short exponential backoff.
+    _SESSION.mount("https://", HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+    ))
+
+    # Ask the API to compress its responses: textual JSON shrinks several-fold
+    # under gzip, cutting bytes on the wire (requests decompresses transparently).
+    # Brotli ('br') compresses better still, but it may only be advertised when a
+    # decoder is actually installed, or the response couldn't be read.
+    try:
+        import brotli
+        accept_encoding = "br, gzip, deflate"
+    except ImportError:
+        try:
+            import brotlicffi
+            accept_encoding = "br, gzip, deflate"
+        except ImportError:
+            accept_encoding = "gzip, deflate"
+
+    # Set the authentication, content-type, and compression headers once on the
+    # Session, so they don't have to be rebuilt for every request.
+    cfg = _get_config()
+    _SESSION.headers.update({
+        "x-app-id": cfg.NUTRITIONIX_APP_ID,
+        "x-app-key": cfg.NUTRITIONIX_API_KEY,
+        "Content-Type": "application/json",
+        "Accept-Encoding": accept_encoding
+    })
+    return _SESSION
+
+# Connect/read timeouts (in seconds) applied to every API call, so a hung
+# server can never stall the program indefinitely.
+_REQUEST_TIMEOUT = (3.05, 10)
+
+# The Nutritionix free tier only allows so many requests per minute. Rather
+# than letting the server bounce the extras with a 429 error (a whole wasted
+# round trip), keep a rolling window of recent request times and wait locally
+# until a slot frees up. The deque's maxlen equals the allowance, so it never
+# holds more timestamps than we care about.
+_RATE_LIMIT_PER_MINUTE = 50
+_RECENT_REQUEST_TIMES = deque(maxlen=_RATE_LIMIT_PER_MINUTE)
+
+def _wait_for_rate_limit():
+    """
+    Blocks until we are allowed to make another API request, then records the
+    request time. Timestamps older than a minute are dropped from the window;
+    if the window is still full, sleep exactly long enough for the oldest
+    entry to age out. Cache hits never reach this gate, so only genuine
+    network calls are counted.
+    """
+    now = time.monotonic()
+    while _RECENT_REQUEST_TIMES and now - _RECENT_REQUEST_TIMES[0] > 60:
+        _RECENT_REQUEST_TIMES.popleft()
+    if len(_RECENT_REQUEST_TIMES) >= _RATE_LIMIT_PER_MINUTE:
+        wait_seconds = 60 - (now - _RECENT_REQUEST_TIMES[0])
+        _LOG.info("  > Rate limit reached; waiting %.1fs before the next API call...", wait_seconds)
+        time.sleep(wait_seconds)
+        _RECENT_REQUEST_TIMES.popleft()
+    _RECENT_REQUEST_TIMES.append(time.monotonic())
+
+# The nutrients we report for each food, as (label, API key, unit) triples.
+# Driving the formatting from this table keeps the output logic to a single
+# loop instead of seven near-identical lines of code.
+NUTRIENT_SPECS = (
+    ("Calories", "nf_calories", "kcal"),
+    ("Protein", "nf_protein", "g"),
+    ("Total Fat", "nf_total_fat", "g"),
+    ("Total Carbohydrates", "nf_total_carbohydrate", "g"),
+    ("Dietary Fiber", "nf_dietary_fiber", "g"),
+    ("Sugars", "nf_sugars", "g"),
+    ("Sodium", "nf_sodium", "mg"),
+)
+
+# Pulls all seven nutrient values out of a food dict in a single C-level call,
+# instead of seven separate .get() method calls per food.
+_NUTRIENT_GETTER = itemgetter(*(key for _, key, _ in NUTRIENT_SPECS))
+
+# The full per-food block of the report, precompiled once from the table
+# above. Filling it with one format_map call replaces ten separate appends
+# and f-strings per food with a single C-level substitution pass.
+_FOOD_TEMPLATE = (
+    "\nFood: {food_name} ({serving_qty} {serving_unit})\n"
+    + "".join(f"  {label}: {{{key}}}\n" for label, key, _ in NUTRIENT_SPECS)
+    + "-" * 30 + "\n"
+)
+
+# The only keys the formatter reads from each food entry. The raw Nutritionix
+# payload carries dozens more (photo URLs, alternate measures, tag data, ...);
+# dropping those right after parsing keeps less dead weight in memory and
+# makes the cached copies of each response several times smaller.
+_NEEDED_FOOD_KEYS = ('food_name', 'serving_qty', 'serving_unit') + tuple(key for _, key, _ in NUTRIENT_SPECS)
+
+def _slim_response(response_json: dict) -> dict:
+    """
+    Returns a trimmed copy of an API response, keeping only the 'foods' list
+    and, inside each food, only the keys the formatter actually uses.
+    """
+    return {
+        "foods": [
+            {key: food[key] for key in _NEEDED_FOOD_KEYS if key in food}
+            for food in response_json.get('foods', [])
+        ]
+    }
+
+class _DeleteUnmapped(dict):
+    """
+    A translation table for str.translate that deletes any character it has
+    no entry for (a missing key returns None, which str.translate treats as
+    'remove this character').
+    """
+    def __missing__(self, key):
+        return None
+
+# Translation table for filename sanitization: letters, digits, and
+# underscores pass through, spaces become underscores, and everything else is
+# deleted. str.translate applies the whole table in one C-level pass over the
+# string, replacing the old per-character Python loop plus the second
+# .replace(' ', '_') pass.
+_SANITIZE_TABLE = _DeleteUnmapped({ord(c): c for c in string.ascii_letters + string.digits + '_'})
+_SANITIZE_TABLE[ord(' ')] = '_'
+
+# Gmail's SMTP endpoint. The host name is resolved to an IP address once per
+# run (see _resolve_smtp_ip) so each new connection skips the DNS lookup.
+_SMTP_HOST = 'smtp.gmail.com'
+_SMTP_PORT = 465
+_SMTP_HOST_IP = None
+
+# A food item may only contain letters and spaces. The pattern is compiled
+# once at import time so each validation is a single C-level match instead of
+# a Python-level loop calling isalpha()/isspace() on every character.
+_VALID_FOOD = re.compile(r"[A-Za-z ]+")
+
+# A small thread pool used to overlap independent waits, e.g., performing the
+# TLS handshake and login to the email server while the report file is still
+# being written to disk. Sequentially those costs add up; overlapped, the
+# total wait is just the longer of the two.
+_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+
+# Cache of API responses from this run, keyed by the normalized (trimmed,
+# lowercased) query string. Nutritional facts change very slowly, so asking
+# the API twice for the same food is pure duplicate work: a cache hit returns
+# in microseconds instead of a full network round trip. The cache is a small
+# LRU: once it holds _RESPONSE_CACHE_MAX entries, the least recently used one
+# is evicted, so a long batch run can't grow it without bound.
+_RESPONSE_CACHE = OrderedDict()
+_RESPONSE_CACHE_MAX = 500
+
+def _remember_response(cache_key, response_json):
+    """Stores a response in the in-memory LRU cache, evicting the least recently used entry once the cap is reached."""
+    _RESPONSE_CACHE[cache_key] = response_json
+    _RESPONSE_CACHE.move_to_end(cache_key)
+    if len(_RESPONSE_CACHE) > _RESPONSE_CACHE_MAX:
+        _RESPONSE_CACHE.popitem(last=False)
+
+# The in-memory cache above only helps within one run. Responses are also
+# kept in a small JSON file so that queries repeated across runs (today's
+# lookup of a food already checked last week) skip the network too. Each
+# entry records when it was stored; entries older than the TTL are re-fetched.
+# The file lives in the user's cache directory rather than the working
+# directory, so it is shared no matter where the program is launched from.
+_CACHE_DIR = os.path.expanduser(os.path.join("~", ".cache", "nutrition_tracker"))
+_CACHE_PATH = os.path.join(_CACHE_DIR, "nutrition_cache.json")
+_CACHE_TTL_SECONDS = 7 * 86400  # Cached responses stay fresh for 7 days.
+
+# "No foods found" answers are cached too (stored as data=None), so retyping
+# the same misspelling never costs another API round trip. They get a much
+# shorter lifetime than real data: a food the API doesn't know today might
+# well be added soon.
+_NEGATIVE_TTL_SECONDS = 86400  # Negative results are remembered for 1 day.
+
+def _load_disk_cache():
+    """Loads the on-disk response cache, or returns an empty dict if the file is missing or unreadable."""
+    try:
+        with open(_CACHE_PATH, 'rb') as f:
+            return _json_loads(f.read())
+    except (OSError, ValueError):
+        return {}
+
+_DISK_CACHE = _load_disk_cache()
+
+# The parallel fallback path (get_nutritional_info_concurrent) can finish
+# several lookups at once, and each one updates the shared dict and rewrites
+# the same cache file. This lock makes update + serialize + write + swap one
+# indivisible step, so no thread serializes the dict mid-mutation or
+# interleaves bytes with another writer in the temp file.
+_DISK_CACHE_LOCK = threading.Lock()
+
+def _store_in_disk_cache(cache_key, response_json, etag=None):
+    """
+    Records a fresh API response (or, with response_json=None, a negative
+    "no foods found" result) in the on-disk cache. The file is rewritten
+    to a temporary path and swapped in with os.replace, which is atomic: a
+    crash mid-write can never leave a half-written cache behind.
+
+    The optional etag is the server's version tag for the response. When the
+    entry later expires, it lets the next request revalidate with
+    If-None-Match: a tiny 304 reply confirms the data is unchanged without
+    re-sending the whole JSON body.
+    """
+    with _DISK_CACHE_LOCK:
+        _DISK_CACHE[cache_key] = {"ts": time.time(), "data": response_json, "etag": etag}
+        temp_path = _CACHE_PATH + ".tmp"
+        try:
+            os.makedirs(_CACHE_DIR, exist_ok=True)
+            with open(temp_path, 'wb') as f:
+                f.write(_json_dumps_bytes(_DISK_CACHE))
+            os.replace(temp_path, _CACHE_PATH)
+        except OSError as e:
+            # A broken cache write should never break the lookup itself.
+            _LOG.warning("  > Could not update the response cache: %s", e)
 
 
 # --- Function Definitions ---
 
 def get_user_food_input():
     """
-    Prompts the user to enter a food item they want to get nutritional information for.
-    It includes a basic loop to ensure the user provides a non-empty input.
+    Collects the food items to get nutritional information for. The items can
+    come from three places, checked in this order:
+    1. Command-line arguments (anything that is not a --flag), so the program
+       can be scripted: python main.py apple "chicken breast"
+    2. Piped standard input (one item per line), when input is not a terminal:
+       echo "apple" | python main.py
+    3. An interactive prompt (comma-separated), with a retry loop to ensure
+       the user provides a non-empty, valid input.
 
     Returns:
-        str: The food item entered by the user, stripped of leading/trailing whitespace.
+        list: The food items, each stripped of leading/trailing whitespace.
     """
+    # 1. Command-line arguments: every non-flag argument is an item (and may
+    #    itself hold several comma-separated items).
+    argv_items = [piece.strip()
+                  for arg in sys.argv[1:] if not arg.startswith("--")
+                  for piece in arg.split(",") if piece.strip()]
+    if argv_items:
+        return argv_items
+
+    # 2. Piped input: when stdin is not an interactive terminal, read one
+    #    item per line. input() would block forever waiting for a keyboard
+    #    that isn't there.
+    if not sys.stdin.isatty():
+        return [line.strip() for line in sys.stdin if line.strip()]
+
+    # 3. Interactive prompt.
     while True:
-        food_item = input("Enter a food item to get its nutritional info (e.g., 'apple', 'chicken breast'): ").strip()
-        
+        raw_input_line = input("Enter one or more food items, separated by commas (e.g., 'apple, chicken breast'): ").strip()
+
         # Check if the input is not empty
-        if not food_item:
+        if not raw_input_line:
+            print("Food item cannot be empty. Please enter something.")
+            continue  # Continue the loop to ask again
+
+        # Split the line on commas into individual items, dropping any empty
+        # pieces (e.g., from a trailing comma or 'apple,,rice').
+        food_items = [item.strip() for item in raw_input_line.split(",") if item.strip()]
+        if not food_items:
             print("Food item cannot be empty. Please enter something.")
             continue  # Continue the loop to ask again
 
-        # Check if the input consists only of letters and spaces
-        if not all(c.isalpha() or c.isspace() for c in food_item):
-            print("Invalid input. Please enter a food item using only letters and spaces.")
+        # Check that every item consists only of letters and spaces,
+        # using the precompiled pattern (fullmatch = the whole item must match).
+        if not all(_VALID_FOOD.fullmatch(item) for item in food_items):
+            print("Invalid input. Please enter food items using only letters and spaces.")
             continue # Continue the loop to ask again
 
         # If both checks pass, the input is considered valid
-        return food_item
+        return food_items
 
 def get_nutritional_info(food_item):
     """
@@ -94,67 +438,188 @@ def get_nutritional_info(food_item):
         dict or None: A Python dictionary containing the raw JSON response from the API if successful,
                       otherwise None if an error occurs or no data is found.
     """
+    # A batch query arrives as one newline-separated string (see
+    # get_nutritional_info_batch); show it with commas in console messages.
+    display_query = ", ".join(food_item.split("\n"))
+
+    # Normalize the query so that "Apple", " apple " and "apple" share one
+    # cache entry, then return the cached response if we already have it.
+    cache_key = food_item.strip().lower()
+    if cache_key in _RESPONSE_CACHE:
+        # Mark the entry as freshly used so the LRU eviction spares it.
+        _RESPONSE_CACHE.move_to_end(cache_key)
+        cached = _RESPONSE_CACHE[cache_key]
+        if cached is None:
+            # A remembered negative result: this exact query already came back
+            # empty, so repeating it would just waste the round trip.
+            _LOG.warning("  > No detailed nutritional data found for '%s'. Please check spelling or try a more specific item.", display_query)
+            return None
+        _LOG.info("  > Using cached nutritional data for '%s' (no API call needed).", display_query)
+        return cached
+
+    # Not seen this run; check the on-disk cache from previous runs, ignoring
+    # entries older than the TTL. Negative entries (data=None) use their own,
+    # shorter TTL; once one goes stale it is simply ignored and re-queried.
+    disk_entry = _DISK_CACHE.get(cache_key)
+    if disk_entry:
+        entry_age = time.time() - disk_entry["ts"]
+        if disk_entry["data"] is None:
+            if entry_age < _NEGATIVE_TTL_SECONDS:
+                _LOG.warning("  > No detailed nutritional data found for '%s'. Please check spelling or try a more specific item.", display_query)
+                _remember_response(cache_key, None)
+                return None
+            disk_entry = None
+        elif entry_age < _CACHE_TTL_SECONDS:
+            _LOG.info("  > Using cached nutritional data for '%s' (no API call needed).", display_query)
+            _remember_response(cache_key, disk_entry["data"])
+            return disk_entry["data"]
+
+    # A stale cache entry with an ETag can still save most of the work: send
+    # the tag along and the server may answer 304 ("nothing changed") instead
+    # of re-sending the whole body.
+    revalidation_headers = None
+    if disk_entry and disk_entry.get("etag"):
+        revalidation_headers = {"If-None-Match": disk_entry["etag"]}
+
     # The URL for the Nutritionix Natural Language for Nutrients endpoint.
     url = "https://trackapi.nutritionix.com/v2/natural/nutrients"
-    
-    # Headers required for API authentication and specifying content type.
-    # 'x-app-id' and 'x-app-key' are your unique credentials from Nutritionix.
-    # 'Content-Type: application/json' tells the API that the request body is JSON.
-    headers = {
-        "x-app-id": NUTRITIONIX_APP_ID,
-        "x-app-key": NUTRITIONIX_API_KEY,
-        "Content-Type": "application/json"
-    }
-    
+
     # The request body, sent as JSON. Nutritionix expects the food item query under the 'query' key.
     data = {
         "query": food_item
     }
 
     # Inform the user that an API call is being made.
-    print(f"  > Querying Nutritionix API for '{food_item}'...")
-    
+    _LOG.info("  > Querying Nutritionix API for '%s'...", display_query)
+
+    # Stay under the API's requests-per-minute allowance; a short local wait
+    # here is cheaper than a 429 rejection after a full round trip.
+    _wait_for_rate_limit()
+
+    # Only now is the network truly needed, so this is where 'requests' gets
+    # loaded (a no-op after the first call). The exception handlers below
+    # need the module name; _get_session() builds the configured Session.
+    import requests
+    session = _get_session()
+
     try:
-        # Make a POST request to the Nutritionix API.
-        # 'url': The endpoint.
-        # 'headers': Authentication and content type.
+        # Make a POST request to the Nutritionix API through the shared Session.
+        # The Session already carries the authentication headers, reuses the
+        # keep-alive connection from any previous call, and retries transient errors.
         # 'json=data': The request body sent as JSON.
-        response = requests.post(url, headers=headers, json=data)
-        
+        response = session.post(url, json=data, timeout=_REQUEST_TIMEOUT,
+                                headers=revalidation_headers)
+
+        # 304 Not Modified: the stale cache entry is still correct. Refresh
+        # its timestamp and reuse it without transferring or parsing a body.
+        if response.status_code == 304 and disk_entry:
+            _LOG.info("  > Cached data for '%s' revalidated by the server (no body transferred).", display_query)
+            _remember_response(cache_key, disk_entry["data"])
+            _store_in_disk_cache(cache_key, disk_entry["data"], etag=disk_entry.get("etag"))
+            return disk_entry["data"]
+
         # Check if the HTTP request was successful (status code 200).
         # If not, it raises an HTTPError exception which is caught below.
         response.raise_for_status()
         
         # Parse the JSON response from the API into a Python dictionary.
-        response_json = response.json()
+        # response.content is the already-buffered response bytes, so handing
+        # it straight to the decoder avoids the extra copy that .text makes.
+        response_json = _json_loads(response.content)
 
         # Check if the 'foods' key exists in the response and if it's not empty.
         # The Nutritionix API returns a list of food items under the 'foods' key.
         if not response_json.get('foods'):
-            print(f"  > No detailed nutritional data found for '{food_item}'. Please check spelling or try a more specific item.")
+            _LOG.warning("  > No detailed nutritional data found for '%s'. Please check spelling or try a more specific item.", display_query)
+            # Remember the empty answer too, so retyping the same misspelling
+            # is answered from cache instead of another API round trip.
+            _remember_response(cache_key, None)
+            _store_in_disk_cache(cache_key, None)
             return None # Return None if no food data is found
-        
+
+        # Keep only the fields the rest of the program uses before caching
+        # and returning; everything else in the payload is dead weight.
+        response_json = _slim_response(response_json)
+
+        # Remember the successful response so repeat queries (in this run or
+        # within the next week) skip the network entirely.
+        _remember_response(cache_key, response_json)
+        _store_in_disk_cache(cache_key, response_json,
+                             etag=response.headers.get("ETag"))
         return response_json # Return the raw JSON data (as a Python dict)
         
     # --- Error Handling for API Requests ---
     # Catch specific HTTP errors (e.g., 401 Unauthorized, 404 Not Found, 500 Server Error).
     except requests.exceptions.HTTPError as errh:
-        print(f"  > HTTP Error occurred: {errh} (Status Code: {errh.response.status_code})")
+        _LOG.error("  > HTTP Error occurred: %s (Status Code: %s)", errh, errh.response.status_code)
         if errh.response.status_code == 401:
-            print("  > Please double-check your Nutritionix APP_ID and API_KEY in config.py.")
+            _LOG.error("  > Please double-check your Nutritionix APP_ID and API_KEY in config.py.")
     # Catch errors related to network connection issues (e.g., no internet).
     except requests.exceptions.ConnectionError as errc:
-        print(f"  > Connection Error occurred: {errc} (Are you connected to the internet?)")
+        _LOG.error("  > Connection Error occurred: %s (Are you connected to the internet?)", errc)
     # Catch errors if the API takes too long to respond.
     except requests.exceptions.Timeout as errt:
-        print(f"  > Timeout Error occurred: {errt} (API took too long to respond)")
+        _LOG.error("  > Timeout Error occurred: %s (API took too long to respond)", errt)
     # Catch any other unexpected errors that might occur during the request.
     except requests.exceptions.RequestException as err:
-        print(f"  > An unexpected error occurred during the API request: {err}")
+        _LOG.error("  > An unexpected error occurred during the API request: %s", err)
     
     return None # Return None if any exception occurred
 
-def format_nutritional_data(raw_data):
+def get_nutritional_info_batch(food_items):
+    """
+    Fetches nutritional information for several food items with a single API call.
+    The Nutritionix endpoint accepts a multi-item query (one item per line) and
+    returns one entry per item in its 'foods' list, so looking up a whole meal
+    costs one network round trip instead of one per item.
+
+    Args:
+        food_items (list): The food items to query (e.g., ["apple", "1 cup rice"]).
+
+    Returns:
+        dict or None: Same as get_nutritional_info, with one 'foods' entry per item.
+    """
+    # Join the items with newlines, which the API parses as separate foods,
+    # and reuse the single-query function (including its cache and error handling).
+    # The items are sorted first so the same meal entered in a different order
+    # ("rice, apple" vs "apple, rice") maps to one query string — and therefore
+    # one cache entry — instead of two. The report simply lists the foods in
+    # that same sorted order.
+    return get_nutritional_info("\n".join(sorted(food_items, key=str.lower)))
+
+def get_nutritional_info_concurrent(food_items):
+    """
+    Fetches nutritional information for several food items as independent,
+    parallel requests (one request per item) instead of one batched query.
+
+    The batched call is normally cheaper (one round trip in total), but it is
+    all-or-nothing: a single unrecognized item can sink the whole query. This
+    variant isolates failures per item, and because the requests run on a
+    thread pool over the shared Session's connection pool, the wall time is
+    close to the slowest single lookup rather than the sum of them all.
+
+    Args:
+        food_items (list): The food items to query.
+
+    Returns:
+        dict or None: A combined {'foods': [...]} dict holding the results of
+                      every item that succeeded, or None if they all failed.
+    """
+    # One worker per item (capped at 8 to stay well inside the Session's
+    # 16-connection pool, leaving headroom for other callers).
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, len(food_items))) as pool:
+        results = list(pool.map(get_nutritional_info, food_items))
+
+    # Merge the per-item responses into one dict shaped like a batch response,
+    # skipping the items that failed (get_nutritional_info returned None for
+    # them and already printed why).
+    foods = []
+    for result in results:
+        if result:
+            foods.extend(result.get('foods', []))
+    return {"foods": foods} if foods else None
+
+def format_nutritional_data(raw_data: dict) -> str:
     """
     Takes the raw nutritional data (a Python dictionary obtained from the API)
     and formats it into a clean, human-readable string.
@@ -169,47 +634,112 @@ def format_nutritional_data(raw_data):
     if not raw_data or not raw_data.get('foods'):
         return "No nutritional data available."
 
-    # Initialize the string with a header.
-    formatted_string = "--- Nutritional Information ---\n"
-    
+    # Collect the output lines in a list and join them once at the end.
+    # Growing a string with '+=' in a loop copies all the previous characters
+    # on every iteration (quadratic work overall); appending to a list and
+    # joining is a single linear pass.
+    parts = ["--- Nutritional Information ---\n"]
+
     # The Nutritionix API response often contains a list of food items under the 'foods' key.
     # Iterate through each food item found in the response.
     for food in raw_data['foods']:
         # Safely retrieve food attributes using .get() method.
         # .get(key, default_value) returns the value for the key, or default_value if key is not found.
         # .title() capitalizes the first letter of each word in the food name for better presentation.
-        food_name = food.get('food_name', 'N/A').title()
-        serving_qty = food.get('serving_qty', 1)
-        serving_unit = food.get('serving_unit', 'serving')
-        
-        # Retrieve nutrient values. These can be numbers or None if not available.
-        calories = food.get('nf_calories')
-        protein = food.get('nf_protein')
-        fat = food.get('nf_total_fat')
-        carbs = food.get('nf_total_carbohydrate')
-        fiber = food.get('nf_dietary_fiber')
-        sugar = food.get('nf_sugars')
-        sodium = food.get('nf_sodium')
-
-        # Append formatted lines for each nutrient to the string.
-        # Use an f-string for easy formatting.
-        # Check if the nutrient value is a number (int or float) before formatting to 2 decimal places.
-        # If not a number, display "N/A".
-        formatted_string += f"\nFood: {food_name} ({serving_qty} {serving_unit})\n"
-        formatted_string += f"  Calories: {calories:.2f} kcal\n" if isinstance(calories, (int, float)) else "  Calories: N/A\n"
-        formatted_string += f"  Protein: {protein:.2f} g\n" if isinstance(protein, (int, float)) else "  Protein: N/A\n"
-        formatted_string += f"  Total Fat: {fat:.2f} g\n" if isinstance(fat, (int, float)) else "  Total Fat: N/A\n"
-        formatted_string += f"  Total Carbohydrates: {carbs:.2f} g\n" if isinstance(carbs, (int, float)) else "  Total Carbohydrates: N/A\n"
-        formatted_string += f"  Dietary Fiber: {fiber:.2f} g\n" if isinstance(fiber, (int, float)) else "  Dietary Fiber: N/A\n"
-        formatted_string += f"  Sugars: {sugar:.2f} g\n" if isinstance(sugar, (int, float)) else "  Sugars: N/A\n"
-        formatted_string += f"  Sodium: {sodium:.2f} mg\n" if isinstance(sodium, (int, float)) else "  Sodium: N/A\n"
-        formatted_string += "-" * 30 + "\n" # Add a separator for clarity between food items
-
-    return formatted_string # Return the final formatted string
-
-def save_to_file(data, food_item, filename_prefix="nutrition_data"):
-    """
-    Saves the provided nutritional data string to a text file.
+        fields = {
+            'food_name': food.get('food_name', 'N/A').title(),
+            'serving_qty': food.get('serving_qty', 1),
+            'serving_unit': food.get('serving_unit', 'serving'),
+        }
+
+        # Fetch all seven nutrient values at once. itemgetter raises KeyError
+        # if a key is missing from the payload entirely, in which case fall
+        # back to the (slower but forgiving) per-key .get() lookups.
+        try:
+            values = _NUTRIENT_GETTER(food)
+        except KeyError:
+            values = tuple(food.get(key) for _, key, _ in NUTRIENT_SPECS)
+
+        # Normalize each nutrient into its display form ("12.00 g" or "N/A"),
+        # driven by the NUTRIENT_SPECS table. Values can be numbers or
+        # None/missing, so check that each one is a number before formatting
+        # it to 2 decimal places. JSON numbers decode to exactly float or
+        # int, so an exact type check is sufficient and skips isinstance's
+        # subclass scan over the tuple (it also keeps True/False, a subclass
+        # of int, from formatting as 1.00).
+        for (_label, key, unit), value in zip(NUTRIENT_SPECS, values):
+            value_type = type(value)
+            if value_type is float or value_type is int:
+                fields[key] = f"{value:.2f} {unit}"
+            else:
+                fields[key] = "N/A"
+
+        # One substitution pass fills the whole per-food block, separator
+        # line included.
+        parts.append(_FOOD_TEMPLATE.format_map(fields))
+
+    return "".join(parts) # Join all the collected lines into the final string
+
+# Open file descriptors for output directories, opened once per directory and
+# kept for the life of the program. Opening files relative to a directory fd
+# lets the kernel skip re-resolving the directory path on every save — a
+# saving that adds up when a batch writes many reports to the same folder.
+_DIR_FDS = {}
+
+def _get_dir_fd(directory):
+    """
+    Returns a cached read-only fd for the given directory, opening it on
+    first use, or None when the platform can't open files relative to a
+    directory fd (os.open without dir_fd support) or the directory can't be
+    opened. Cached fds are closed automatically when the program exits.
+    """
+    if os.open not in os.supports_dir_fd:
+        return None
+    fd = _DIR_FDS.get(directory)
+    if fd is None:
+        try:
+            fd = os.open(directory, os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0))
+        except OSError:
+            return None
+        _DIR_FDS[directory] = fd
+        atexit.register(os.close, fd)
+    return fd
+
+# Today's date string, cached so repeated saves don't re-run strftime (and
+# its localtime lookup) for an answer that only changes once a day. The cache
+# holds [day number, date string]; the day number counts local days, so the
+# string is rebuilt exactly when the local date flips at midnight.
+_DATE_CACHE = [None, ""]
+
+def _today():
+    """Returns today's date as 'YYYY-MM-DD', recomputed only when the day changes."""
+    now = int(time.time())
+    local = time.localtime(now)
+    day = (now + local.tm_gmtoff) // 86400
+    if day != _DATE_CACHE[0]:
+        _DATE_CACHE[0] = day
+        _DATE_CACHE[1] = time.strftime("%Y-%m-%d", local)
+    return _DATE_CACHE[1]
+
+def _sanitize_food_name(food_item: str) -> str:
+    """
+    Makes a food query string safe for use in a filename.
+    It removes any characters that are not alphanumeric, spaces, or underscores,
+    then replaces spaces with underscores. This prevents issues with invalid file paths.
+
+    Args:
+        food_item (str): The raw food query (e.g., "apple, chicken breast").
+
+    Returns:
+        str: The sanitized string (e.g., "apple_chicken_breast").
+    """
+    return food_item.translate(_SANITIZE_TABLE)
+
+def save_to_file(data: str, food_item: str, filename_prefix: str = "nutrition_data",
+                 directory: str = "logs", durable: bool = False, date_str: str = None):
+    """
+    Saves the provided nutritional data string to a text file inside the given
+    directory (the 'logs' folder by default).
     The filename is constructed to be unique and descriptive, including the food item
     and the current date in YYYY-MM-DD format.
 
@@ -217,105 +747,334 @@ def save_to_file(data, food_item, filename_prefix="nutrition_data"):
         data (str): The formatted nutritional information string to be saved.
         food_item (str): The food item string, used to sanitize and include in the filename.
         filename_prefix (str): An optional prefix for the filename (default is "nutrition_data").
+        directory (str): The folder the file is written into. The caller should
+                         make sure it exists (main creates it once at startup).
+        durable (bool): When True, force the data onto the disk with os.fsync
+                        before returning. Off by default because the report is
+                        also emailed, so losing it in a crash is not critical
+                        and the sync would just slow every run down.
+        date_str (str, optional): The YYYY-MM-DD date to use in the filename.
+                        main computes this once per run and passes it in, so
+                        the filename and the email subject always agree (even
+                        if the run straddles midnight). Defaults to today.
 
     Returns:
         str or None: The full path to the created file if successful, otherwise None.
     """
-    # Get the current date and format it as YYYY-MM-DD.
-    current_date = datetime.datetime.now().strftime("%Y-%m-%d") # Changed from %m-%d-%Y to %Y-%m-%d
+    # Use the date the caller passed in, or get today's date as YYYY-MM-DD.
+    current_date = date_str if date_str is not None else _today()
 
     # Sanitize the food_item string to ensure it's safe for use in a filename.
-    # It removes any characters that are not alphanumeric, spaces, or underscores,
-    # then replaces spaces with underscores. This prevents issues with invalid file paths.
-    sanitized_food_item = "".join(c for c in food_item if c.isalnum() or c in (' ', '_')).replace(' ', '_')
-    
-    # Construct the full filename.
-    filename = f"{filename_prefix}_{sanitized_food_item}_{current_date}.txt"
-    
+    sanitized_food_item = _sanitize_food_name(food_item)
+
+
+    # Construct the full path directly inside the target directory. Writing
+    # the file in its final location avoids the old save-then-move dance
+    # (one extra rename and its failure handling per run).
+    base_name = f"{filename_prefix}_{sanitized_food_item}_{current_date}.txt"
+    filename = os.path.join(directory, base_name)
+
     try:
-        # Open the file in write mode ('w'). If the file doesn't exist, it's created.
-        # If it exists, its content is truncated (emptied) before writing.
-        with open(filename, 'w') as f:
-            f.write(data) # Write the provided data string to the file.
-        
-        print(f"  > Nutritional data saved temporarily to '{filename}'")
+        # Encode the whole report once and push it out through a raw file
+        # descriptor. Skipping Python's file-object wrappers (TextIOWrapper
+        # over BufferedWriter over FileIO) means no buffering layers and no
+        # per-write encoding work: just os.write on the bytes. The loop
+        # handles the (rare) case of a short write; the memoryview slices
+        # the remaining bytes without copying them.
+        #
+        # The bytes go to a temporary file first and are swapped into place
+        # with os.replace, which is atomic: nothing reading the logs folder
+        # (and no crash mid-write) can ever see a half-written report.
+        # Where supported, both the open and the final rename are done
+        # relative to a cached fd for the output directory, so the kernel
+        # skips walking the directory path on every save. With no dir fd
+        # (dir_fd=None) the same calls fall back to plain full paths.
+        dir_fd = _get_dir_fd(directory)
+        temp_name = (base_name if dir_fd is not None else filename) + '.tmp'
+        final_name = base_name if dir_fd is not None else filename
+        payload = memoryview(data.encode('utf-8'))
+        # Reports beyond ~1 MB (huge aggregated batches) are written through
+        # a memory map instead of os.write: the file is sized up front and
+        # the bytes land straight in the page cache with one copy, no write
+        # syscalls per chunk. Mapping needs a read+write descriptor; small
+        # reports keep the plain write-only path, which is cheaper to set up.
+        use_mmap = len(payload) >= 1 << 20
+        open_flags = (os.O_RDWR if use_mmap else os.O_WRONLY) | os.O_CREAT | os.O_TRUNC
+        fd = os.open(temp_name, open_flags, 0o644, dir_fd=dir_fd)
+        try:
+            if use_mmap:
+                import mmap
+                os.ftruncate(fd, len(payload))
+                with mmap.mmap(fd, len(payload)) as mapped:
+                    mapped[:] = payload
+            else:
+                written = 0
+                while written < len(payload):
+                    written += os.write(fd, payload[written:])
+            if durable:
+                # Only pay for the disk flush when the caller asked for it.
+                os.fsync(fd)
+            if hasattr(os, 'posix_fadvise'):
+                # These reports are write-once and never read back by us, so
+                # tell the kernel it needn't keep the pages cached.
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+        os.replace(temp_name, final_name, src_dir_fd=dir_fd, dst_dir_fd=dir_fd)
+
+        _LOG.info("  > Nutritional data saved to '%s'", filename)
         return filename # Return the path of the newly created file.
     except IOError as e:
         # Catch any Input/Output errors (e.g., permission denied, disk full).
-        print(f"  > Error saving file '{filename}': {e}")
+        _LOG.error("  > Error saving file '%s': %s", filename, e)
         return None # Return None if saving failed.
 
-def send_email(subject, body, to_email, attachment_path=None):
+def _resolve_smtp_ip():
     """
-    Sends an email using Gmail's SMTP server. It can include a plain text body
-    and an optional file attachment. Authentication is done using an App Password.
+    Resolves the Gmail SMTP host name to an IP address once and caches it,
+    so every connection after the first skips the DNS lookup.
+
+    Returns:
+        str: The server's IP address.
+    """
+    global _SMTP_HOST_IP
+    if _SMTP_HOST_IP is None:
+        _SMTP_HOST_IP = socket.gethostbyname(_SMTP_HOST)
+    return _SMTP_HOST_IP
+
+# The tuned SMTP_SSL subclass, created on first use by _get_smtp_class() so
+# importing this module doesn't drag smtplib in with it.
+_SMTP_CLASS = None
+
+def _get_smtp_class():
+    """
+    Builds (once) and returns an SMTP_SSL variant that disables Nagle's
+    algorithm on its TCP socket. SMTP is a strict request/response protocol
+    made of tiny commands, and Nagle can hold each tiny command back (up to
+    ~40 ms) hoping to batch it with more data that is never coming. Turning
+    it off (TCP_NODELAY) lets the EHLO/AUTH/MAIL sequence proceed at full
+    speed. The class is defined here, not at module level, so smtplib is only
+    imported when email is actually used.
+    """
+    global _SMTP_CLASS
+    if _SMTP_CLASS is None:
+        import smtplib
+
+        class _NoDelaySMTPSSL(smtplib.SMTP_SSL):
+            def _get_socket(self, host, port, timeout):
+                # Create the TCP connection ourselves so TCP_NODELAY can be
+                # set before the TLS handshake begins.
+                sock = socket.create_connection((host, port), timeout, self.source_address)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                # Wrap the socket in TLS, always validating the certificate against
+                # the real host name even though we dialed a pre-resolved IP address.
+                return self.context.wrap_socket(sock, server_hostname=_SMTP_HOST)
+
+        _SMTP_CLASS = _NoDelaySMTPSSL
+    return _SMTP_CLASS
+
+def _open_authenticated_smtp():
+    """
+    Connects to Gmail's SMTP server securely over SSL and logs in using the
+    App Password. Kept as its own small function so the (slow) connection and
+    login can also be run on a background thread while other work happens.
+
+    Returns:
+        smtplib.SMTP_SSL: A connected, logged-in SMTP connection. The caller
+                          is responsible for closing it (e.g., with .quit()).
+    """
+    # Connect securely to the pre-resolved server address (skipping DNS) with
+    # Nagle's algorithm disabled for the chatty SMTP command exchange.
+    smtp = _get_smtp_class()(_resolve_smtp_ip(), _SMTP_PORT)
+    # Log in to the SMTP server using the sender's email and the App Password.
+    cfg = _get_config()
+    smtp.login(cfg.SENDER_EMAIL, cfg.GMAIL_APP_PASSWORD)
+    return smtp
+
+class SmtpClient:
+    """
+    A small wrapper around one logged-in SMTP connection that can send several
+    messages. Opening a connection costs several network round trips (TLS
+    handshake plus login), so paying that once and reusing the connection makes
+    every send after the first a single round trip.
+
+    Intended use, as a context manager:
+        with SmtpClient() as client:
+            client.send(message_one)
+            client.send(message_two)
+    """
+
+    def __init__(self, smtp_connection=None):
+        # Optionally adopt an already-opened connection (e.g., one that was
+        # opened on a background thread); otherwise connect on first use.
+        self.smtp = smtp_connection
+
+    def __enter__(self):
+        # Make sure we have a live, logged-in connection before the first send.
+        if self.smtp is None:
+            self.smtp = _open_authenticated_smtp()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Always close the connection when leaving the 'with' block.
+        self.close()
+
+    def send(self, msg):
+        """Sends one message, reconnecting once if the server has dropped the idle connection."""
+        import smtplib # Already loaded by the time a connection exists; this is just a name lookup.
+
+        if self.smtp is None:
+            self.smtp = _open_authenticated_smtp()
+        else:
+            # The server silently drops connections that sit idle for too
+            # long. A cheap NOOP probe finds that out now, so we can
+            # reconnect up front instead of failing halfway through a send.
+            try:
+                self.smtp.noop()
+            except Exception:
+                self.smtp = _open_authenticated_smtp()
+        try:
+            self.smtp.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # The server closed the connection while it sat idle; log in
+            # again and retry the send once.
+            self.smtp = _open_authenticated_smtp()
+            self.smtp.send_message(msg)
+
+    def close(self):
+        """Closes the underlying connection politely (ignoring errors if it is already gone)."""
+        if self.smtp is not None:
+            try:
+                self.smtp.quit()
+            except Exception:
+                pass
+            self.smtp = None
+
+def _new_message(subject, to_email, body):
+    """
+    Builds the envelope of an outgoing email: the multipart container, the
+    From/To/Subject headers, and the plain-text body part. Factored out so
+    that a batch sender can stamp out any number of messages (adding its own
+    attachments to each) without repeating this setup code.
 
     Args:
         subject (str): The subject line of the email.
-        body (str): The plain text content of the email.
         to_email (str): The recipient's email address.
-        attachment_path (str, optional): The full path to a file to attach. Defaults to None.
+        body (str): The plain text content of the email.
 
     Returns:
-        bool: True if the email was sent successfully, False otherwise.
+        MIMEMultipart: A message ready for extra parts and sending.
     """
+    # Imported on first use (see the note at the top of the file) so that
+    # runs which never send an email skip the email package entirely.
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
     # Create a MIMEMultipart object. This allows the email to contain both
     # a text part and an attachment part (if provided).
     msg = MIMEMultipart()
-    msg['From'] = SENDER_EMAIL      # Set the sender's email address (from config.py)
+    msg['From'] = _get_config().SENDER_EMAIL  # Set the sender's email address (from config.py)
     msg['To'] = to_email            # Set the recipient's email address
     msg['Subject'] = subject        # Set the subject of the email
 
     # Attach the main body of the email as plain text.
     msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+def send_email(subject, body, to_email, attachment_path=None, smtp_connection=None,
+               attach_bytes=None, attach_name=None):
+    """
+    Sends an email using Gmail's SMTP server. It can include a plain text body
+    and an optional attachment, provided either as a path to a file on disk or
+    as raw bytes already in memory. Authentication is done using an App Password.
+
+    Args:
+        subject (str): The subject line of the email.
+        body (str): The plain text content of the email.
+        to_email (str): The recipient's email address.
+        attachment_path (str, optional): The full path to a file to attach. Defaults to None.
+        smtp_connection (smtplib.SMTP_SSL, optional): An already-connected and
+            logged-in SMTP connection (e.g., one opened in the background while
+            the report file was being written). If None, a new connection is
+            opened here. Either way the connection is closed before returning.
+        attach_bytes (bytes, optional): Raw attachment content already in memory.
+            When given, the attachment is built directly from these bytes and
+            no file is opened or read, which skips the disk entirely.
+        attach_name (str, optional): The filename shown to the recipient for
+            an 'attach_bytes' attachment.
 
-    # If an attachment path is provided, try to attach the file.
-    if attachment_path:
+    Returns:
+        bool: True if the email was sent successfully, False otherwise.
+    """
+    # Imported on first use (see the note at the top of the file) so that
+    # runs which never send an email skip the smtplib/email import cost.
+    import smtplib
+    from email.mime.application import MIMEApplication
+    from email.mime.base import MIMEBase
+
+    # Build the envelope (headers + body) through the shared factory.
+    msg = _new_message(subject, to_email, body)
+
+    # If the attachment content is already in memory, build the MIME part
+    # straight from the bytes: no file open, read, or disk traffic at all.
+    if attach_bytes is not None:
+        part = MIMEApplication(attach_bytes, _subtype="octet-stream")
+        part.add_header(
+            "Content-Disposition",
+            "attachment",
+            filename=attach_name or "nutrition_data.txt",
+        )
+        msg.attach(part)
+    # Otherwise, if an attachment path is provided, try to attach the file.
+    elif attachment_path:
         try:
-            # Open the file in binary read mode ('rb') to read its raw bytes.
+            # Stream the file through base64 in chunks instead of reading the
+            # whole file into memory and then encoding it in a second full
+            # pass. 57 raw bytes encode to one standard 76-character MIME
+            # line, so reading whole multiples of 57 KB keeps every chunk's
+            # encoded output aligned on line boundaries with no carry-over.
+            part = MIMEBase("application", "octet-stream")
+            encoded = io.BytesIO()
             with open(attachment_path, "rb") as attachment:
-                # Create a MIMEBase object for the attachment.
-                # "application/octet-stream" is a generic content type for binary data.
-                part = MIMEBase("application", "octet-stream")
-                part.set_payload(attachment.read()) # Read the file's content and set it as the payload.
-            
-            # Encode the payload using Base64 for safe email transmission.
-            # This converts binary data into an ASCII string format suitable for emails.
-            encoders.encode_base64(part)
-            
+                while chunk := attachment.read(57 * 1024):
+                    encoded.write(base64.encodebytes(chunk))
+            part.set_payload(encoded.getvalue().decode("ascii"))
+            part.add_header("Content-Transfer-Encoding", "base64")
+
             # Add a header to specify the filename of the attachment for the recipient.
             # os.path.basename(attachment_path) extracts just the filename from the full path.
             part.add_header(
                 "Content-Disposition",
-                f"attachment; filename= {os.path.basename(attachment_path)}",
+                "attachment",
+                filename=os.path.basename(attachment_path),
             )
             msg.attach(part) # Attach the encoded file part to the email message.
         except Exception as e:
             # Catch any errors that occur during file attachment (e.g., file not found).
-            print(f"  > Could not attach file '{attachment_path}': {e}")
+            _LOG.warning("  > Could not attach file '%s': %s", attachment_path, e)
             # The function will still try to send the email body, even if the attachment failed.
 
     # --- Email Sending Logic ---
     try:
-        print(f"  > Attempting to send email to {to_email}...")
-        # Connect to Gmail's SMTP server securely using SSL encryption on port 465.
-        # 'with smtplib.SMTP_SSL(...) as smtp:' ensures the connection is properly closed.
-        with smtplib.SMTP_SSL('smtp.gmail.com', 465) as smtp:
-            # Log in to the SMTP server using the sender's email and the App Password.
-            smtp.login(SENDER_EMAIL, GMAIL_APP_PASSWORD)
+        _LOG.info("  > Attempting to send email to %s...", to_email)
+        # Send through the reusable client. It adopts the pre-opened
+        # connection if one was handed in (its TLS handshake and login already
+        # happened, possibly in the background), reconnects automatically if
+        # the server dropped an idle connection, and closes cleanly on exit.
+        with SmtpClient(smtp_connection) as client:
             # Send the entire email message (including all its parts: text, attachments).
-            smtp.send_message(msg)
-        print(f"  > Email sent successfully to {to_email}!")
+            client.send(msg)
+        _LOG.info("  > Email sent successfully to %s!", to_email)
         return True # Return True to indicate successful email sending.
     # --- Email Error Handling ---
     # Catch specific authentication errors (e.g., incorrect App Password).
     except smtplib.SMTPAuthenticationError:
-        print("  > Email authentication failed. Check your SENDER_EMAIL and GMAIL_APP_PASSWORD in config.py.")
-        print("  > Make sure you are using an App Password for Gmail, not your regular password.")
+        _LOG.error("  > Email authentication failed. Check your SENDER_EMAIL and GMAIL_APP_PASSWORD in config.py.")
+        _LOG.error("  > Make sure you are using an App Password for Gmail, not your regular password.")
         return False # Indicate authentication failure.
     # Catch any other general exceptions that might occur during the email sending process.
     except Exception as e:
-        print(f"  > Error sending email: {e}")
+        _LOG.error("  > Error sending email: %s", e)
         return False # Indicate a general sending error.
 
 
@@ -324,79 +1083,122 @@ def main():
     The main function that orchestrates the entire Nutrition Tracker program flow.
     It integrates user input, API calls, data formatting, file saving/moving, and email sending.
     """
+    # Warnings and errors are always shown; the step-by-step progress
+    # messages only appear when the user asked for them with --verbose.
+    _configure_logging("--verbose" in sys.argv)
+
     # Print a welcome message for the program.
     print("\n--- Nutrition Tracker (Step 4: Email & File Management) ---")
 
-    # Get the food item from the user using the dedicated function.
-    food_item = get_user_food_input()
+    # Keeping a copy of each report on disk is optional: pass --archive on the
+    # command line to save files under 'logs/'. Without it, the report is only
+    # emailed (built straight from memory), so the run does no disk I/O at all.
+    archive = "--archive" in sys.argv
+    if archive:
+        # Create the 'logs' directory once at startup if it doesn't already exist,
+        # so 'save_to_file' can write files straight into their final location.
+        # 'exist_ok=True' prevents an error if the directory is already present.
+        os.makedirs("logs", exist_ok=True)
+
+    # Get the food items from the user using the dedicated function.
+    food_items = get_user_food_input()
+
+    # Proceed only if the user entered at least one food item.
+    if food_items:
+        # A single readable string describing the whole query, used in console
+        # messages, the saved filename, and the email subject/body.
+        food_query = ", ".join(food_items)
+
+        # Compute today's date (YYYY-MM-DD) exactly once per run. The same
+        # string is used for the saved filename and the email subject, so the
+        # two can never disagree (e.g., when a run straddles midnight).
+        run_date = _today()
+
+        # Kick off the email server connection and login on a background
+        # thread right away, so the SMTP TLS handshake and authentication run
+        # in parallel with the API call below. By the time the nutritional
+        # data arrives, the mail connection is usually already logged in.
+        smtp_future = _EXECUTOR.submit(_open_authenticated_smtp)
+
+        # Call the API function to fetch raw nutritional data for all items
+        # in one batched request.
+        nutritional_data_raw = get_nutritional_info_batch(food_items)
 
-    # Proceed only if the user entered a food item.
-    if food_item:
-        # Call the API function to fetch raw nutritional data.
-        nutritional_data_raw = get_nutritional_info(food_item)
+        # A batched query is all-or-nothing: one bad item can sink it. If it
+        # failed and there were several items, retry them individually (in
+        # parallel) so the good items still come back.
+        if nutritional_data_raw is None and len(food_items) > 1:
+            _LOG.warning("  > Batched lookup failed; retrying the items individually in parallel...")
+            nutritional_data_raw = get_nutritional_info_concurrent(food_items)
 
         # Proceed only if nutritional data was successfully retrieved from the API.
         if nutritional_data_raw:
             # Format the raw data into a readable string.
             formatted_data = format_nutritional_data(nutritional_data_raw)
-            # Print the formatted data to the console for immediate user feedback.
-            print("\n" + formatted_data)
-
-            # Save the formatted data to a file.
-            # The 'save_to_file' function now returns the path to the newly created file.
-            original_file_path = save_to_file(formatted_data, food_item)
-
-            # Proceed if the file was successfully saved.
-            if original_file_path:
-                print(f"  > Processing saved file for '{food_item}'...")
-
-                # --- File Management: Create 'logs' folder and Move File ---
-                # Define the name of the directory where files will be moved.
-                logs_dir = "logs"
-                # Create the 'logs' directory if it doesn't already exist.
-                # 'exist_ok=True' prevents an error if the directory is already present.
-                os.makedirs(logs_dir, exist_ok=True)
-
-                # Construct the new full path for the file inside the 'logs' directory.
-                # os.path.basename() extracts just the filename (e.g., "data_apple_2025-07-30.txt")
-                # os.path.join() safely combines the directory and filename for cross-platform compatibility.
-                new_file_path = os.path.join(logs_dir, os.path.basename(original_file_path))
-
-                try:
-                    # Move the file from its original location to the new 'logs' directory.
-                    # os.rename() can move files across directories on the same disk.
-                    os.rename(original_file_path, new_file_path)
-                    print(f"  > File moved to '{new_file_path}'")
-                    # IMPORTANT: Update the 'original_file_path' variable to the new location.
-                    # This ensures the 'send_email' function attaches the file from its correct, new path.
-                    original_file_path = new_file_path
-                except OSError as e:
-                    # Handle errors during the file moving process (e.g., permissions, disk issues).
-                    print(f"  > Error moving file to logs folder: {e}")
-                    print("  > Attempting to send email using the file's original location (if it still exists).")
-
-                # --- Email Preparation and Sending ---
-                # Prepare the email subject, ensuring the date format matches the file (YYYY-MM-DD).
-                email_subject = f"Nutrition Report for: {food_item} ({datetime.datetime.now().strftime('%Y-%m-%d')})"
-                # Prepare the email body, including a friendly message and the formatted nutritional data.
-                email_body = f"Hello,\n\nHere is the detailed nutritional information for '{food_item}' that you requested via the Nutrition Tracker program.\n\n{formatted_data}\n\nBest regards,\nYour Nutrition Tracker"
-
-                print("  > Preparing to send email...")
-                # Call the 'send_email' function, passing the subject, body, recipient,
-                # and the updated path to the saved file as an attachment.
-                email_sent_successfully = send_email(email_subject, email_body, RECEIVER_EMAIL, original_file_path)
-
-                # Provide feedback on the email sending operation.
-                if email_sent_successfully:
-                    print("  > Email operation completed.")
-                else:
-                    print("  > Email sending failed. Please check the error messages above.")
+            # Show the formatted report for immediate user feedback. Writing
+            # the pre-encoded bytes to the underlying buffer in one call
+            # avoids print()'s per-line locking, encoding and flushing.
+            sys.stdout.buffer.write(("\n" + formatted_data + "\n").encode('utf-8'))
+            sys.stdout.buffer.flush()
+
+            # Save the formatted data to a file in the 'logs' folder, but only
+            # when the user asked for an on-disk archive. The email below does
+            # not depend on the file (its attachment is built from memory), so
+            # the disk write can run on the background thread and overlap with
+            # the email send instead of delaying it.
+            save_future = None
+            if archive:
+                save_future = _EXECUTOR.submit(save_to_file, formatted_data,
+                                               food_query, date_str=run_date)
+
+            # --- Email Preparation and Sending ---
+            # Prepare the email subject, reusing the run date so it matches the filename exactly.
+            email_subject = f"Nutrition Report for: {food_query} ({run_date})"
+            # Prepare the email body, including a friendly message and the formatted nutritional data.
+            email_body = f"Hello,\n\nHere is the detailed nutritional information for '{food_query}' that you requested via the Nutrition Tracker program.\n\n{formatted_data}\n\nBest regards,\nYour Nutrition Tracker"
+
+            _LOG.info("  > Preparing to send email...")
+            # Collect the SMTP connection that was being opened in the
+            # background. If that failed (e.g., no network yet), fall back
+            # to letting 'send_email' open its own connection and report
+            # the error through its normal handling.
+            try:
+                smtp_connection = smtp_future.result()
+            except Exception as e:
+                _LOG.warning("  > Background email connection failed (%s); retrying during send...", e)
+                smtp_connection = None
+
+            # Attach the report straight from memory in both modes: the same
+            # bytes are already at hand, so even when a copy is being archived
+            # to disk there is no reason to open and re-read it. The name is
+            # built the same way 'save_to_file' builds its filename, so the
+            # attachment always matches the archived file exactly.
+            attachment_name = f"nutrition_data_{_sanitize_food_name(food_query)}_{run_date}.txt"
+            email_sent_successfully = send_email(email_subject, email_body, _get_config().RECEIVER_EMAIL,
+                                                 smtp_connection=smtp_connection,
+                                                 attach_bytes=formatted_data.encode('utf-8'),
+                                                 attach_name=attachment_name)
+
+            # Provide feedback on the email sending operation.
+            if email_sent_successfully:
+                _LOG.info("  > Email operation completed.")
             else:
-                # If file saving failed, inform the user that subsequent operations (email, moving) were skipped.
-                print("  > File was not saved, so email and file moving could not be done.")
+                _LOG.error("  > Email sending failed. Please check the error messages above.")
+
+            # Now that the email is on its way, collect the background disk
+            # write (if one was requested) so a failure is still reported
+            # before the program exits.
+            if save_future is not None and not save_future.result():
+                _LOG.warning("  > File was not saved; the report was still emailed.")
         else:
             # If API data retrieval failed, inform the user.
-            print(f"Could not retrieve nutritional information for '{food_item}'. Operation aborted.")
+            _LOG.error("Could not retrieve nutritional information for '%s'. Operation aborted.", food_query)
+            # No email will be sent on this path, so close the background
+            # connection (if it managed to open at all).
+            try:
+                smtp_future.result().quit()
+            except Exception:
+                pass
     else:
         # If no food item was entered, inform the user and exit.
         print("No food item entered. The program will now exit.")